@@ -1829,6 +1829,27 @@ class Layer(tf.Module, version_utils.LayerVersionSelector):
                 output_weights.append(weight)
         return backend.batch_get_value(output_weights)
 
+    def _save_state(self):
+        """Experimental method for saving the state of this layer object."""
+        weights = self._trainable_weights + self._non_trainable_weights
+        return {str(i): weight.numpy() for i, weight in enumerate(weights)}
+
+    def _load_state(self, state_dict):
+        """Experimental method for loading the state of this layer object."""
+        weights = self._trainable_weights + self._non_trainable_weights
+        for i, weight in enumerate(weights):
+            key = str(i)
+            # The layer may not have been built when it was saved, in which
+            # case only the weights that have state recorded are restored.
+            if key in state_dict:
+                value = state_dict[key]
+                if value.dtype != weight.dtype.as_numpy_dtype:
+                    # The archive may hold a reduced-precision copy of the
+                    # weights (see the `dtype` argument of
+                    # `saving_lib.save`).
+                    value = tf.cast(value, weight.dtype)
+                weight.assign(value)
+
     @doc_controls.do_not_generate_docs
     def finalize_state(self):
         """Finalizes the layers state after updating layer weights.
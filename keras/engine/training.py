@@ -3750,8 +3750,10 @@ class Model(base_layer.Layer, version_utils.ModelVersionSelector):
     def _compile_was_called(self):
         return self._is_compiled
 
-    def _save_new(self, dirpath):
-        return saving_lib.save(self, dirpath)
+    def _save_new(self, dirpath, dtype=None, save_format="keras"):
+        return saving_lib.save(
+            self, dirpath, dtype=dtype, save_format=save_format
+        )
 
 
 def reduce_per_replica(values, strategy, reduction="auto"):
@@ -680,6 +680,29 @@ class _BaseOptimizer(tf.__internal__.tracking.AutoTrackable):
         """
         return self._variables
 
+    def _save_state(self):
+        """Experimental method for saving the state of this optimizer."""
+        return {
+            str(i): variable.numpy()
+            for i, variable in enumerate(self.variables())
+        }
+
+    def _load_state(self, state_dict):
+        """Experimental method for loading the state of this optimizer."""
+        for i, variable in enumerate(self.variables()):
+            key = str(i)
+            # The optimizer may not have been built when it was saved, in
+            # which case only the variables that have state recorded are
+            # restored.
+            if key in state_dict:
+                value = state_dict[key]
+                if value.dtype != variable.dtype.as_numpy_dtype:
+                    # The archive may hold a reduced-precision copy of the
+                    # state (see the `dtype` argument of
+                    # `saving_lib.save`).
+                    value = tf.cast(value, variable.dtype)
+                variable.assign(value)
+
 
 base_optimizer_keyword_args = """name: String. The name to use
         for momentum accumulator weights created by
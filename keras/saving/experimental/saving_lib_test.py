@@ -15,6 +15,7 @@
 """Tests for Keras python-based idempotent saving functions (experimental)."""
 import os
 import sys
+import zipfile
 
 import numpy as np
 import tensorflow.compat.v2 as tf
@@ -238,6 +239,125 @@ class NewSavingTest(tf.test.TestCase, parameterized.TestCase):
             tf.TensorShape([None, 32]), loaded_model._build_input_shape
         )
 
+    def test_saving_model_state(self):
+        temp_dir = os.path.join(self.get_temp_dir(), "my_model")
+        subclassed_model = self._get_subclassed_model()
+        x = np.random.random((100, 32))
+        y = np.random.random((100, 1))
+        subclassed_model.fit(x, y, epochs=1)
+
+        # Assign some custom values to the weights so that we can verify they
+        # are restored, rather than freshly initialized.
+        subclassed_model.dense1.kernel.assign(np.full((32, 1), 7.0))
+        subclassed_model.dense1.bias.assign([8.0])
+
+        subclassed_model._save_new(temp_dir)
+        loaded_model = saving_lib.load(temp_dir)
+
+        # The weights are supposed to be the custom values assigned above.
+        self.assertAllClose(
+            np.full((32, 1), 7.0), loaded_model.dense1.kernel.numpy()
+        )
+        self.assertAllClose([8.0], loaded_model.dense1.bias.numpy())
+
+    def test_saving_model_state_with_reduced_dtype(self):
+        temp_dir = os.path.join(self.get_temp_dir(), "my_model")
+        subclassed_model = self._get_subclassed_model()
+        x = np.random.random((100, 32))
+        y = np.random.random((100, 1))
+        subclassed_model.fit(x, y, epochs=1)
+        subclassed_model._save_new(temp_dir, dtype="float16")
+        loaded_model = saving_lib.load(temp_dir)
+
+        # The weights are restored in the variables' own dtype, with only the
+        # reduced (float16) precision retained.
+        self.assertEqual(tf.float32, loaded_model.dense1.kernel.dtype)
+        self.assertAllClose(
+            subclassed_model.dense1.kernel.numpy(),
+            loaded_model.dense1.kernel.numpy(),
+            atol=1e-3,
+        )
+
+    def test_saving_model_state_to_dir(self):
+        temp_dir = os.path.join(self.get_temp_dir(), "my_model")
+        subclassed_model = self._get_subclassed_model()
+        x = np.random.random((100, 32))
+        y = np.random.random((100, 1))
+        subclassed_model.fit(x, y, epochs=1)
+        subclassed_model.dense1.kernel.assign(np.full((32, 1), 7.0))
+        subclassed_model._save_new(temp_dir, save_format="dir")
+
+        # No zip archive is involved; the config and the variables are laid
+        # out as plain files under the directory.
+        self.assertTrue(
+            os.path.exists(os.path.join(temp_dir, saving_lib._CONFIG_FILENAME))
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(temp_dir, saving_lib._ARCHIVE_FILENAME))
+        )
+
+        loaded_model = saving_lib.load(temp_dir)
+        self.assertAllClose(
+            np.full((32, 1), 7.0), loaded_model.dense1.kernel.numpy()
+        )
+
+    def test_loading_subset_of_layers(self):
+        temp_dir = os.path.join(self.get_temp_dir(), "my_model")
+        subclassed_model = self._get_subclassed_model()
+        x = np.random.random((100, 32))
+        y = np.random.random((100, 1))
+        subclassed_model.fit(x, y, epochs=1)
+        subclassed_model.dense1.kernel.assign(np.full((32, 1), 7.0))
+        subclassed_model._save_new(temp_dir)
+
+        # The archive carries a manifest of its state entries.
+        file_path = os.path.join(temp_dir, saving_lib._ARCHIVE_FILENAME)
+        with zipfile.ZipFile(file_path, "r") as zipfile_to_load:
+            self.assertIn(
+                saving_lib._INDEX_FILENAME, zipfile_to_load.namelist()
+            )
+
+        # Only the requested layer's state is read from the archive.
+        loaded_model = saving_lib.load(temp_dir, layers=["dense1"])
+        self.assertAllClose(
+            np.full((32, 1), 7.0), loaded_model.dense1.kernel.numpy()
+        )
+
+        # With an empty subset, the weights keep their initialized values.
+        skipped_model = saving_lib.load(temp_dir, layers=[])
+        self.assertNotAllClose(
+            np.full((32, 1), 7.0), skipped_model.dense1.kernel.numpy()
+        )
+
+    def test_saving_model_state_with_non_ascii_layer_name(self):
+        temp_dir = os.path.join(self.get_temp_dir(), "my_model")
+
+        @keras.utils.generic_utils.register_keras_serializable(
+            package="my_custom_package"
+        )
+        class ModelWithUnicodeAttr(keras.Model):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.dänse1 = MyDense(1)
+
+            def call(self, inputs):
+                return self.dänse1(inputs)
+
+        subclassed_model = ModelWithUnicodeAttr()
+        subclassed_model.compile(optimizer=adam.Adam(), loss="mse")
+        x = np.random.random((100, 32))
+        y = np.random.random((100, 1))
+        subclassed_model.fit(x, y, epochs=1)
+        subclassed_model.dänse1.kernel.assign(np.full((32, 1), 7.0))
+        subclassed_model._save_new(temp_dir)
+
+        # The attribute name becomes part of the zip entry paths, so it must
+        # round-trip through the archive writer's name encoding.
+        loaded_model = saving_lib.load(temp_dir)
+        self.assertAllClose(
+            np.full((32, 1), 7.0), loaded_model.dänse1.kernel.numpy()
+        )
+
     def test_saved_module_paths_and_class_names(self):
         temp_dir = os.path.join(self.get_temp_dir(), "my_model")
         subclassed_model = self._get_subclassed_model()
@@ -246,9 +366,10 @@ class NewSavingTest(tf.test.TestCase, parameterized.TestCase):
         subclassed_model.fit(x, y, epochs=1)
         subclassed_model._save_new(temp_dir)
 
-        file_path = os.path.join(temp_dir, saving_lib._CONFIG_FILE)
-        with tf.io.gfile.GFile(file_path, "r") as f:
-            config_json = f.read()
+        file_path = os.path.join(temp_dir, saving_lib._ARCHIVE_FILENAME)
+        with zipfile.ZipFile(file_path, "r") as zipfile_to_load:
+            with zipfile_to_load.open(saving_lib._CONFIG_FILENAME, "r") as c:
+                config_json = c.read()
         config_dict = json_utils.decode(config_json)
         self.assertEqual(
             config_dict["registered_name"], "my_custom_package>CustomModelX"
@@ -44,15 +44,24 @@ class Encoder(json.JSONEncoder):
     def default(self, obj):
         """Encodes objects for types that aren't handled by the default
         encoder."""
-        if isinstance(obj, tf.TensorShape):
-            items = obj.as_list() if obj.rank is not None else None
-            return {"class_name": "TensorShape", "items": items}
-        return get_json_type(obj)
+        return default_encoder(obj)
 
     def encode(self, obj):
         return super().encode(_encode_tuple(obj))
 
 
+def default_encoder(obj):
+    """Encodes objects for types that aren't handled by default.
+
+    This is the flat, function-based counterpart of `Encoder.default` for
+    serializers that take a `default=` hook (such as `orjson`).
+    """
+    if isinstance(obj, tf.TensorShape):
+        items = obj.as_list() if obj.rank is not None else None
+        return {"class_name": "TensorShape", "items": items}
+    return get_json_type(obj)
+
+
 def _encode_tuple(x):
     if isinstance(x, tuple):
         return {